@@ -1,8 +1,16 @@
 # -*- coding: utf-8 -*-
+import datetime
+import os
+from concurrent.futures import ThreadPoolExecutor
 import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 import pandas as pd
-from io import StringIO, BytesIO
-from processor import procesar_global, clean_cols
+from io import BytesIO
+from openpyxl import Workbook
+from openpyxl.cell import Cell, WriteOnlyCell
+from openpyxl.styles import Alignment, Border, Font, PatternFill, Side
+from openpyxl.utils import get_column_letter
+from processor import procesar_global, clean_cols, pct_to_numeric
 
 # =====================================================
 # 🔧 CONFIGURACIÓN DE PÁGINA
@@ -13,18 +21,173 @@ st.title("📊 Consolidado Global Aeroportuario - CLAIRPORT")
 # =====================================================
 # 📥 FUNCIONES DE LECTURA
 # =====================================================
+UTF8_BOM = b"\xef\xbb\xbf"
+CHUNK_MIN_BYTES = 50 * 1024 * 1024
+CHUNK_ROWS = 200_000
+# read_csv infiere tipos por bloque: los ids se leen como texto para que no cambien de un bloque a otro.
+CHUNK_TEXT_COLUMNS = {"journey_id": str}
+
+def csv_options(data: bytes, sep: str | None = None) -> tuple[str, str]:
+    # Con BOM el archivo es UTF-8 y utf-8-sig lo descarta al decodificar; sin BOM se asume latin-1.
+    encoding = "utf-8-sig" if data.startswith(UTF8_BOM) else "latin-1"
+    if sep is None:
+        head = data[:65536]
+        sep = ";" if head.count(b";") > head.count(b",") else ","
+    return sep, encoding
+
+# CSV grande leído en bloques de CHUNK_ROWS filas; se puede recorrer más de una vez.
+class CsvChunks:
+    def __init__(self, data: bytes, sep: str | None = None):
+        self.data = data
+        self.sep, self.encoding = csv_options(data, sep)
+
+    def __iter__(self):
+        with pd.read_csv(BytesIO(self.data), sep=self.sep, engine="c", encoding=self.encoding,
+                         dtype=CHUNK_TEXT_COLUMNS, chunksize=CHUNK_ROWS, low_memory=False) as reader:
+            yield from reader
+
+def is_temporal(s: pd.Series) -> bool:
+    if pd.api.types.is_datetime64_any_dtype(s):
+        return True
+    # date32 y time32 llegan como object con datetime.date / datetime.time.
+    if s.dtype != object:
+        return False
+    valores = s.dropna()
+    return not valores.empty and isinstance(valores.iloc[0], (datetime.date, datetime.time))
+
+@st.cache_data(show_spinner=False)
+def _read_csv_cached(data: bytes, sep: str | None = None) -> pd.DataFrame:
+    sep, encoding = csv_options(data, sep)
+    try:
+        df = pd.read_csv(BytesIO(data), sep=sep, engine="pyarrow", encoding=encoding)
+    except Exception:
+        df = None
+    # pyarrow no renombra encabezados duplicados (engine="c" los deja como "a", "a.1").
+    if df is None or df.columns.duplicated().any():
+        return pd.read_csv(BytesIO(data), sep=sep, engine="c", encoding=encoding, low_memory=False)
+
+    # pyarrow infiere fechas, horas y timestamps (los con zona horaria pasan a UTC). Esas columnas
+    # se releen como texto original con engine="c", para que los process_* reciban los mismos
+    # tipos y la misma hora local que con engine="c" (y que con CsvChunks).
+    temporales = [c for c in df.columns if is_temporal(df[c])]
+    if temporales:
+        texto = pd.read_csv(BytesIO(data), sep=sep, engine="c", encoding=encoding,
+                            usecols=temporales, dtype=str, low_memory=False)
+        for c in temporales:
+            df[c] = texto[c]
+    return df
+
+@st.cache_data(show_spinner=False)
+def _read_excel_cached(data: bytes) -> pd.DataFrame:
+    return pd.read_excel(BytesIO(data))
+
+# El hasher por defecto de Streamlit solo muestrea 10.000 filas en frames de 50.000+ filas:
+# una re-carga corregida del mismo tamaño podría reutilizar un consolidado viejo. Se hashea todo.
+def _hash_frame(df: pd.DataFrame) -> bytes:
+    encabezado = repr((list(df.columns), [str(t) for t in df.dtypes])).encode()
+    return encabezado + pd.util.hash_pandas_object(df).to_numpy().tobytes()
+
+@st.cache_data(show_spinner=False, hash_funcs={pd.DataFrame: _hash_frame, CsvChunks: lambda c: (c.data, c.sep)})
+def procesar_global_cached(df_ventas, df_perf, df_aud, df_off, df_dur, df_dur30, df_insp, df_aband, df_resc, df_whatsapp, date_from, date_to):
+    return procesar_global(df_ventas, df_perf, df_aud, df_off, df_dur, df_dur30, df_insp, df_aband, df_resc, df_whatsapp, date_from, date_to)
+
+def read_uploaded_bytes(uploaded_file):
+    return uploaded_file.getvalue() if hasattr(uploaded_file, "getvalue") else uploaded_file.read()
+
+# Los CSV grandes no se cargan completos: los process_* los agregan bloque a bloque.
+def read_csv(uploaded_file, sep=None):
+    data = read_uploaded_bytes(uploaded_file)
+    if len(data) >= CHUNK_MIN_BYTES:
+        return CsvChunks(data, sep)
+    return _read_csv_cached(data, sep)
+
 def read_generic_csv(uploaded_file):
-    raw = uploaded_file.read()
-    uploaded_file.seek(0)
-    text = raw.decode("latin-1").replace("ï»¿","").replace("\ufeff","")
-    sep = ";" if text.count(";") > text.count(",") else ","
-    return pd.read_csv(StringIO(text), sep=sep, engine="python")
+    return read_csv(uploaded_file)
 
 def read_auditorias_csv(uploaded_file):
-    raw = uploaded_file.read()
-    uploaded_file.seek(0)
-    text = raw.decode("latin-1").replace("ï»¿","").replace("\ufeff","")
-    return pd.read_csv(StringIO(text), sep=";", engine="python")
+    return read_csv(uploaded_file, sep=";")
+
+def as_frame(source):
+    return pd.concat(source, ignore_index=True) if isinstance(source, CsvChunks) else source.copy()
+
+def read_excel(uploaded_file):
+    return _read_excel_cached(read_uploaded_bytes(uploaded_file))
+
+def read_all_parallel(jobs):
+    ctx = get_script_run_ctx()
+
+    def run(reader, uploaded_file):
+        add_script_run_ctx(ctx=ctx)
+        return reader(uploaded_file)
+
+    with ThreadPoolExecutor(max_workers=min(len(jobs), os.cpu_count() or 1)) as ex:
+        futures = {name: ex.submit(run, reader, f) for name, (reader, f) in jobs.items()}
+        return {name: fut.result() for name, fut in futures.items()}
+
+# =====================================================
+# 🔍 FUNCIONES DE DIAGNÓSTICO
+# =====================================================
+def numeric_report(s: pd.Series) -> tuple[bool, int]:
+    fallos = int(pct_to_numeric(s).isna().sum() - s.isna().sum())
+    return fallos == 0, fallos
+
+# =====================================================
+# 📤 FUNCIONES DE EXPORTACIÓN
+# =====================================================
+HEADER_FONT = Font(bold=True)
+HEADER_BORDER = Border(*(Side(style="thin"),) * 4)
+HEADER_ALIGN = Alignment(horizontal="center", vertical="top")
+PURPLE_FILL = PatternFill("solid", fgColor="4A2B8D")
+PURPLE_FONT = Font(color="FFFFFF", bold=True)
+
+# Hoja en modo write-only: las filas se vuelcan a disco al hacer append y no quedan en memoria.
+def write_sheet(workbook, sheet_name, df, highlight_cols=()):
+    ws = workbook.create_sheet(sheet_name)
+    for i in highlight_cols:
+        ws.column_dimensions[get_column_letter(i + 1)].width = 22
+
+    def text(value):
+        # openpyxl interpreta como fórmula cualquier texto que parte con "=" (p.ej. "=== VENTAS ===").
+        cell = WriteOnlyCell(ws, value=value)
+        cell.data_type = "s"
+        return cell
+
+    def purple(value):
+        cell = value if isinstance(value, Cell) else WriteOnlyCell(ws, value=value)
+        cell.fill = PURPLE_FILL
+        cell.font = PURPLE_FONT
+        return cell
+
+    header = []
+    for col in df.columns:
+        cell = WriteOnlyCell(ws, value=str(col))
+        cell.font, cell.border, cell.alignment = HEADER_FONT, HEADER_BORDER, HEADER_ALIGN
+        header.append(cell)
+    for i in highlight_cols:
+        header[i].fill, header[i].font = PURPLE_FILL, PURPLE_FONT
+    ws.append(header)
+
+    for row in df.itertuples(index=False, name=None):
+        values = [
+            None if pd.isna(v) else text(v) if isinstance(v, str) and v.startswith("=") else v
+            for v in row
+        ]
+        for i in highlight_cols:
+            values[i] = purple(values[i])
+        ws.append(values)
+    return ws
+
+def build_excel(df_diario, df_sem, df_periodo, df_transp, week_col_positions):
+    workbook = Workbook(write_only=True)
+
+    write_sheet(workbook, "Diario", df_diario)
+    write_sheet(workbook, "Semanal", df_sem)
+    write_sheet(workbook, "Periodo", df_periodo)
+    write_sheet(workbook, "Vista_Traspuesta", df_transp, highlight_cols=week_col_positions)
+
+    output = BytesIO()
+    workbook.save(output)
+    return output.getvalue()
 
 # =====================================================
 # 📁 CARGA DE ARCHIVOS
@@ -82,22 +245,27 @@ if st.button("🚀 Procesar Consolidado Global", type="primary"):
         st.stop()
 
     try:
-        df_ventas = pd.read_excel(ventas_file) if ventas_file.name.endswith(".xlsx") else read_generic_csv(ventas_file)
-        df_perf = read_generic_csv(perf_file)
-        df_aud = read_auditorias_csv(auditorias_file)
-        df_off = read_generic_csv(offtime_file)
-        df_dur90 = read_generic_csv(dur90_file)
-        df_dur30 = read_generic_csv(dur30_file)
-        df_ins = pd.read_excel(inspecciones_file)
-        df_aband = pd.read_excel(abandonados_file)
-        df_resc = read_generic_csv(rescates_file)
-        df_wa = read_generic_csv(whatsapp_file)
+        leidos = read_all_parallel({
+            "ventas": (read_excel if ventas_file.name.endswith(".xlsx") else read_generic_csv, ventas_file),
+            "perf": (read_generic_csv, perf_file),
+            "aud": (read_auditorias_csv, auditorias_file),
+            "off": (read_generic_csv, offtime_file),
+            "dur90": (read_generic_csv, dur90_file),
+            "dur30": (read_generic_csv, dur30_file),
+            "ins": (read_excel, inspecciones_file),
+            "aband": (read_excel, abandonados_file),
+            "resc": (read_generic_csv, rescates_file),
+            "wa": (read_generic_csv, whatsapp_file),
+        })
+        df_ventas, df_perf, df_aud, df_off = leidos["ventas"], leidos["perf"], leidos["aud"], leidos["off"]
+        df_dur90, df_dur30, df_ins = leidos["dur90"], leidos["dur30"], leidos["ins"]
+        df_aband, df_resc, df_wa = leidos["aband"], leidos["resc"], leidos["wa"]
     except Exception as e:
         st.error(f"❌ Error leyendo archivos: {e}")
         st.stop()
 
     try:
-        df_diario, df_sem, df_periodo, df_transp = procesar_global(
+        df_diario, df_sem, df_periodo, df_transp, week_col_positions = procesar_global_cached(
             df_ventas, df_perf, df_aud, df_off,
             df_dur90, df_dur30, df_ins,
             df_aband, df_resc, df_wa,
@@ -114,24 +282,11 @@ if st.button("🚀 Procesar Consolidado Global", type="primary"):
         st.subheader("📐 Vista Traspuesta")
         st.dataframe(df_transp)
 
-        output = BytesIO()
-        with pd.ExcelWriter(output, engine="xlsxwriter") as writer:
-            df_diario.to_excel(writer, index=False, sheet_name="Diario")
-            df_sem.to_excel(writer, index=False, sheet_name="Semanal")
-            df_periodo.to_excel(writer, index=False, sheet_name="Periodo")
-            df_transp.to_excel(writer, index=False, sheet_name="Vista_Traspuesta")
-
-            workbook = writer.book
-            ws = writer.sheets["Vista_Traspuesta"]
-            purple = workbook.add_format({"bg_color": "#4A2B8D", "font_color": "white", "bold": True})
-
-            for i, col in enumerate(df_transp.columns):
-                if isinstance(col, str) and col.startswith("Semana "):
-                    ws.set_column(i, i, 22, purple)
+        excel_bytes = build_excel(df_diario, df_sem, df_periodo, df_transp, week_col_positions)
 
         st.download_button(
             "💾 Descargar Excel",
-            data=output.getvalue(),
+            data=excel_bytes,
             file_name="Consolidado_Global.xlsx",
             mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
         )
@@ -146,34 +301,26 @@ if st.button("🚀 Procesar Consolidado Global", type="primary"):
             
             st.write("**1. Verificando Performance:**")
             cols_check = ["CSAT", "NPS Score", "Firt (h)", "firt_pct", "Furt (h)", "furt_pct"]
-            df_p_clean = clean_cols(df_perf.copy())
+            df_p_clean = clean_cols(as_frame(df_perf))
             df_p_clean = df_p_clean.rename(columns={"% Firt": "firt_pct", "% Furt": "furt_pct"})
             
             for c in cols_check:
                 if c in df_p_clean.columns:
-                    try:
-                        temp = (df_p_clean[c].astype(str)
-                                .str.replace(",", ".", regex=False)
-                                .str.replace("%", "", regex=False)
-                                .str.strip())
-                        pd.to_numeric(temp)
+                    ok, fallos = numeric_report(df_p_clean[c])
+                    if ok:
                         st.caption(f"✅ Columna `{c}`: OK")
-                    except Exception as err_col:
-                        st.error(f"❌ Columna `{c}`: FALLO. Contiene texto que impide el promedio.")
+                    else:
+                        st.error(f"❌ Columna `{c}`: FALLO. {fallos} valores contienen texto que impide el promedio.")
                 else:
                     st.caption(f"⚠️ Columna `{c}` no encontrada.")
 
             st.write("**2. Verificando Auditorías:**")
-            df_a_clean = clean_cols(df_aud.copy())
+            df_a_clean = clean_cols(as_frame(df_aud))
             if "Total Audit Score" in df_a_clean.columns:
-                try:
-                    temp_a = (df_a_clean["Total Audit Score"].astype(str)
-                              .str.replace(",", ".", regex=False)
-                              .str.replace("%", "", regex=False)
-                              .str.strip())
-                    pd.to_numeric(temp_a)
+                ok, fallos = numeric_report(df_a_clean["Total Audit Score"])
+                if ok:
                     st.caption("✅ Columna `Total Audit Score`: OK")
-                except:
-                    st.error("❌ Columna `Total Audit Score`: FALLO. No es numérica.")
+                else:
+                    st.error(f"❌ Columna `Total Audit Score`: FALLO. {fallos} valores no son numéricos.")
             else:
                 st.caption("⚠️ No se encontró la columna 'Total Audit Score'.")
@@ -1,14 +1,17 @@
 # -*- coding: utf-8 -*-
+import functools
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
 
 # ============================================================
 # 🔧 LIMPIEZA DE COLUMNAS
 # ============================================================
 
+# Sin copia: los process_* son dueños del DataFrame que reciben y lo modifican in situ.
 def clean_cols(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.copy()
     df.columns = (
         df.columns.astype(str)
         .str.replace("ï»¿", "", regex=False)
@@ -17,46 +20,130 @@ def clean_cols(df: pd.DataFrame) -> pd.DataFrame:
     )
     return df
 
+def to_fecha(s: pd.Series, dayfirst: bool = False) -> np.ndarray:
+    fecha = pd.to_datetime(s, errors="coerce", dayfirst=dayfirst, cache=True)
+    # Con zona horaria, .values pasa a UTC: se quita la zona para conservar la fecha local.
+    if isinstance(fecha.dtype, pd.DatetimeTZDtype):
+        fecha = fecha.dt.tz_localize(None)
+    # El cast a datetime64[D] trunca la hora en una sola pasada (más barato que .dt.normalize()).
+    return fecha.values.astype("datetime64[D]").astype("datetime64[ns]")
+
+def pct_to_numeric(s: pd.Series) -> pd.Series:
+    # strip() también quita espacios no separables ("85,5\xa0%"), que pd.to_numeric no ignora.
+    limpio = (
+        s.astype(str)
+        .str.replace("%", "", regex=False)
+        .str.replace(",", ".", regex=False)
+        .str.strip()
+    )
+    return pd.to_numeric(limpio, errors="coerce")
+
+def normalized_categorical(s: pd.Series, upper: bool = False) -> pd.Categorical:
+    codes, uniques = pd.factorize(s)
+    norm = pd.Index(uniques).astype(str).str.strip()
+    norm = norm.str.upper() if upper else norm.str.lower()
+    categories, inverse = np.unique(np.asarray(norm, dtype=object), return_inverse=True)
+    codes = np.append(inverse.ravel(), -1)[codes]
+    return pd.Categorical.from_codes(codes, categories=categories)
+
+def category_mask(cat: pd.Categorical, value: str) -> np.ndarray:
+    if value not in cat.categories:
+        return np.zeros(len(cat), dtype=bool)
+    return cat.codes == cat.categories.get_loc(value)
+
 def safe_pct(numer: pd.Series, denom: pd.Series) -> pd.Series:
     denom2 = denom.replace(0, np.nan)
     return (100.0 * numer / denom2)
 
+# ============================================================
+# 🧮 AGREGACIÓN DIARIA (POR BLOQUES)
+# ============================================================
+
+def fold_daily(rows_iter, spec: dict) -> pd.DataFrame:
+    sum_cols = [c for c, how in spec.items() if how == "sum"]
+    mean_cols = [c for c, how in spec.items() if how == "mean"]
+    uniq_cols = [c for c, how in spec.items() if how == "nunique"]
+    vacio = pd.DataFrame(columns=["fecha", *spec])
+
+    # Por bloque: sumas para "sum", (suma, conteo) para "mean" y pares únicos (fecha, valor) para "nunique".
+    partes, pares = [], {c: [] for c in uniq_cols}
+    for rows in rows_iter:
+        if rows is None:
+            return vacio
+        g = rows.groupby("fecha", sort=False)
+        partes.append(pd.concat([
+            g[sum_cols + mean_cols].sum(),
+            g[mean_cols].count().add_suffix("__n"),
+        ], axis=1))
+        for c in uniq_cols:
+            pares[c].append(rows[["fecha", c]].dropna().drop_duplicates())
+
+    if not partes:
+        return vacio
+
+    total = pd.concat(partes).groupby(level=0, sort=False).sum()
+    diario = pd.DataFrame(index=total.index)
+    for c, how in spec.items():
+        if how == "sum":
+            diario[c] = total[c]
+        elif how == "mean":
+            diario[c] = total[c] / total[f"{c}__n"]
+        else:
+            unicos = pd.concat(pares[c]).drop_duplicates()
+            diario[c] = unicos.groupby("fecha", sort=False)[c].size().reindex(total.index, fill_value=0)
+    return diario.rename_axis("fecha").reset_index()
+
+# Los process_* reciben un DataFrame o un iterable de bloques (p.ej. read_csv con chunksize):
+# la función decorada prepara las filas de cada bloque y fold_daily acumula por día.
+def daily_agg(spec: dict):
+    def decorator(prepare):
+        @functools.wraps(prepare)
+        def wrapper(data):
+            chunks = [data] if isinstance(data, pd.DataFrame) else data
+            return fold_daily((prepare(chunk) for chunk in chunks), spec)
+        return wrapper
+    return decorator
+
 # ============================================================
 # 🟦 PROCESAR VENTAS
 # ============================================================
 
+@daily_agg({
+    "Ventas_Totales": "sum", "Ventas_Compartidas": "sum", "Ventas_Exclusivas": "sum",
+    "Q_pasajeros": "sum", "Q_pasajeros_exclusives": "sum", "Q_pasajeros_compartidas": "sum",
+    "Q_journeys": "nunique",
+})
 def process_ventas(df: pd.DataFrame) -> pd.DataFrame:
     df = clean_cols(df)
 
     if "tm_start_local_at" in df.columns:
-        df["fecha"] = pd.to_datetime(df["tm_start_local_at"], errors="coerce").dt.normalize()
+        df["fecha"] = to_fecha(df["tm_start_local_at"])
     elif "createdAt_local" in df.columns:
-        df["fecha"] = pd.to_datetime(df["createdAt_local"], errors="coerce").dt.normalize()
+        df["fecha"] = to_fecha(df["createdAt_local"])
     elif "date" in df.columns:
-        df["fecha"] = pd.to_datetime(df["date"], errors="coerce", dayfirst=True).dt.normalize()
+        df["fecha"] = to_fecha(df["date"], dayfirst=True)
     else:
-        return pd.DataFrame(columns=[
-            "fecha", "Ventas_Totales", "Ventas_Compartidas", "Ventas_Exclusivas",
-            "Q_journeys", "Q_pasajeros", "Q_pasajeros_exclusives", "Q_pasajeros_compartidas"
-        ])
+        return None
 
     if "qt_price_local" in df.columns:
-        df["qt_price_local"] = (
+        df["qt_price_local"] = pd.to_numeric(
             df["qt_price_local"]
             .astype(str)
             .str.replace(",", "", regex=False)
             .str.replace(" ", "", regex=False)
-            .str.replace("$", "", regex=False)
+            .str.replace("$", "", regex=False),
+            errors="coerce"
         )
-        df["qt_price_local"] = pd.to_numeric(df["qt_price_local"], errors="coerce")
     else:
         df["qt_price_local"] = np.nan
 
-    prod = df.get("ds_product_name", pd.Series([""] * len(df), index=df.index)).astype(str).str.lower().str.strip()
+    prod = normalized_categorical(df.get("ds_product_name", pd.Series([""] * len(df), index=df.index)))
+    is_compartida = category_mask(prod, "van_compartida")
+    is_exclusive = category_mask(prod, "van_exclusive")
 
     df["Ventas_Totales"] = df["qt_price_local"]
-    df["Ventas_Compartidas"] = np.where(prod == "van_compartida", df["qt_price_local"], 0)
-    df["Ventas_Exclusivas"] = np.where(prod == "van_exclusive", df["qt_price_local"], 0)
+    df["Ventas_Compartidas"] = np.where(is_compartida, df["qt_price_local"], 0)
+    df["Ventas_Exclusivas"] = np.where(is_exclusive, df["qt_price_local"], 0)
 
     fr_col = None
     for c in ["finishReason", "finisReason", "FinishReason", "finish_reason", "Finish Reason"]:
@@ -67,46 +154,34 @@ def process_ventas(df: pd.DataFrame) -> pd.DataFrame:
     if fr_col is None:
         is_dropoff = pd.Series([False] * len(df), index=df.index)
     else:
-        is_dropoff = df[fr_col].astype(str).str.strip().str.upper().eq("FINISH_REASON_DROPOFF")
+        fr = normalized_categorical(df[fr_col], upper=True)
+        is_dropoff = pd.Series(category_mask(fr, "FINISH_REASON_DROPOFF"), index=df.index)
 
-    df["Q_pasajeros"] = is_dropoff.astype(int)
-    df["Q_pasajeros_exclusives"] = np.where(is_dropoff & (prod == "van_exclusive"), 1, 0)
-    df["Q_pasajeros_compartidas"] = np.where(is_dropoff & (prod == "van_compartida"), 1, 0)
+    df["Q_pasajeros"] = is_dropoff.astype(np.uint8)
+    df["Q_pasajeros_exclusives"] = np.where(is_dropoff & is_exclusive, 1, 0).astype(np.uint8)
+    df["Q_pasajeros_compartidas"] = np.where(is_dropoff & is_compartida, 1, 0).astype(np.uint8)
 
+    # Solo los journey_id de dropoffs válidos cuentan; el resto queda NaN y el conteo de únicos lo ignora.
     if "journey_id" in df.columns:
-        jid = df["journey_id"].astype(str).str.strip()
-        df["_jid"] = jid
+        jid = df["journey_id"]
+        # Un id numérico con vacíos llega como float (7 -> "7.0"); se pasa a entero para que
+        # el mismo viaje tenga el mismo texto con o sin vacíos en el archivo o en el bloque.
+        if pd.api.types.is_float_dtype(jid) and (jid.dropna() % 1 == 0).all():
+            jid = jid.astype("Int64")
+        jid = jid.astype(str).str.strip()
+        df["Q_journeys"] = jid.where(is_dropoff & jid.ne("") & jid.notna())
     else:
-        df["_jid"] = ""
-
-    diario = df.groupby("fecha", as_index=False).agg({
-        "Ventas_Totales": "sum",
-        "Ventas_Compartidas": "sum",
-        "Ventas_Exclusivas": "sum",
-        "Q_pasajeros": "sum",
-        "Q_pasajeros_exclusives": "sum",
-        "Q_pasajeros_compartidas": "sum",
-    })
-
-    if "journey_id" in df.columns:
-        qj = (
-            df[is_dropoff & df["_jid"].ne("") & df["_jid"].notna()]
-            .groupby("fecha")["_jid"]
-            .nunique()
-            .reset_index()
-            .rename(columns={"_jid": "Q_journeys"})
-        )
-        diario = diario.merge(qj, on="fecha", how="left")
-    else:
-        diario["Q_journeys"] = 0
-
-    diario["Q_journeys"] = diario["Q_journeys"].fillna(0)
-    return diario
+        df["Q_journeys"] = np.nan
+    return df
 
 # ============================================================
 # 🟩 PROCESAR PERFORMANCE
 # ============================================================
 
+@daily_agg({
+    "Q_Encuestas": "sum", "CSAT": "mean", "NPS Score": "mean", "Firt (h)": "mean", "firt_pct": "mean",
+    "Furt (h)": "mean", "furt_pct": "mean", "Reopen": "sum", "Q_Ticket": "sum", "Q_Tickets_Resueltos": "sum",
+})
 def process_performance(df: pd.DataFrame) -> pd.DataFrame:
     df = clean_cols(df)
     df = df.rename(columns={"% Firt": "firt_pct", "% Furt": "furt_pct"})
@@ -114,220 +189,191 @@ def process_performance(df: pd.DataFrame) -> pd.DataFrame:
     cols_to_force_numeric = ["CSAT", "NPS Score", "Firt (h)", "firt_pct", "Furt (h)", "furt_pct"]
     for col in cols_to_force_numeric:
         if col in df.columns:
-            df[col] = (
-                df[col].astype(str)
-                .str.replace("%", "", regex=False)
-                .str.replace(",", ".", regex=False)
-                .str.strip()
-            )
-            df[col] = pd.to_numeric(df[col], errors="coerce")
-
-    df["fecha"] = pd.to_datetime(df["Fecha de Referencia"], errors="coerce").dt.normalize()
-    df["Q_Ticket"] = 1
+            df[col] = pct_to_numeric(df[col])
+
+    df["fecha"] = to_fecha(df["Fecha de Referencia"])
+    df["Q_Ticket"] = np.ones(len(df), dtype=np.uint8)
     
-    status = df["Status"].astype(str).str.lower().str.strip()
-    df["Q_Tickets_Resueltos"] = np.where(status != "pending", 1, 0)
-
-    df["Q_Encuestas"] = np.where(df["CSAT"].notna() | df["NPS Score"].notna(), 1, 0)
-
-    diario = df.groupby("fecha", as_index=False).agg({
-        "Q_Encuestas": "sum",
-        "CSAT": "mean",
-        "NPS Score": "mean",
-        "Firt (h)": "mean",
-        "firt_pct": "mean",
-        "Furt (h)": "mean",
-        "furt_pct": "mean",
-        "Reopen": "sum",
-        "Q_Ticket": "sum",
-        "Q_Tickets_Resueltos": "sum"
-    })
-
-    return diario
+    status = normalized_categorical(df["Status"])
+    df["Q_Tickets_Resueltos"] = np.where(~category_mask(status, "pending"), 1, 0).astype(np.uint8)
+
+    df["Q_Encuestas"] = np.where(df["CSAT"].notna() | df["NPS Score"].notna(), 1, 0).astype(np.uint8)
+
+    return df
 
 # ============================================================
 # 🟪 PROCESAR AUDITORÍAS
 # ============================================================
 
+@daily_agg({"Q_Auditorias": "sum", "Nota_Auditorias": "mean"})
 def process_auditorias(df: pd.DataFrame) -> pd.DataFrame:
     df = clean_cols(df)
     candidates = ["Date Time Reference", "Date Time", "ï»¿Date Time"]
     col_fecha = next((c for c in candidates if c in df.columns), None)
 
     if col_fecha is None:
-        return pd.DataFrame(columns=["fecha", "Q_Auditorias", "Nota_Auditorias"])
-
-    def to_date_aud(x):
-        if pd.isna(x): return None
-        if isinstance(x, (int, float)):
-            try:
-                if x > 30000:
-                    return (datetime(1899, 12, 30) + timedelta(days=float(x))).date()
-            except: pass
-        s = str(x).strip()
-        for fmt in ("%d/%m/%Y", "%d-%m-%Y", "%d/%m/%y", "%d-%m-%y", "%Y-%m-%d", "%Y/%m/%d"):
-            try: return datetime.strptime(s, fmt).date()
-            except: pass
-        try: return pd.to_datetime(s, dayfirst=True).date()
-        except: return None
-
-    df["fecha"] = df[col_fecha].apply(to_date_aud)
+        return None
+
+    s = df[col_fecha]
+    if pd.api.types.is_datetime64_any_dtype(s):
+        out = s
+    else:
+        # Seriales Excel entre 1982 y el máximo de Excel (31/12/9999); el resto se parsea como texto.
+        num = pd.to_numeric(s, errors="coerce")
+        excel_mask = (num > 30000) & (num < 2958466)
+        txt = s.astype(str).str.strip()
+        ymd_mask = ~excel_mask & txt.str.match(r"\d{4}[-/]")
+        dmy_mask = ~excel_mask & ~ymd_mask
+
+        out = pd.Series(pd.NaT, index=s.index, dtype="datetime64[ns]")
+        out[excel_mask] = pd.to_datetime(num[excel_mask], unit="D", origin="1899-12-30", errors="coerce")
+        out[ymd_mask] = pd.to_datetime(txt[ymd_mask], errors="coerce", format="mixed")
+        out[dmy_mask] = pd.to_datetime(txt[dmy_mask], dayfirst=True, errors="coerce", format="mixed")
+
+    df["fecha"] = to_fecha(out)
     df = df[df["fecha"].notna()]
-    df["fecha"] = pd.to_datetime(df["fecha"])
 
     if "Total Audit Score" not in df.columns:
-        return pd.DataFrame(columns=["fecha", "Q_Auditorias", "Nota_Auditorias"])
+        return None
 
-    score_raw = (
-        df["Total Audit Score"]
-        .astype(str)
-        .str.replace(",", ".", regex=False)
-        .str.replace("%", "", regex=False)
-        .str.strip()
-    )
-    df["Nota_Auditorias"] = pd.to_numeric(score_raw, errors="coerce").fillna(0)
-    df["Q_Auditorias"] = 1
-
-    diario = df.groupby("fecha", as_index=False).agg({
-        "Q_Auditorias": "sum",
-        "Nota_Auditorias": "mean"
-    })
+    df["Nota_Auditorias"] = pct_to_numeric(df["Total Audit Score"]).fillna(0)
+    df["Q_Auditorias"] = np.ones(len(df), dtype=np.uint8)
 
-    return diario
+    return df
 
 # ============================================================
 # 🟧 OTROS PROCESADORES
 # ============================================================
 
+@daily_agg({"OFF_TIME": "sum"})
 def process_offtime(df: pd.DataFrame) -> pd.DataFrame:
     df = clean_cols(df)
-    df["fecha"] = pd.to_datetime(df["tm_start_local_at"], errors="coerce").dt.normalize()
+    df["fecha"] = to_fecha(df["tm_start_local_at"])
     df["OFF_TIME"] = np.where(
-        df["Segment Arrived to Airport vs Requested"] != "02. A tiempo (0-20 min antes)",
+        ~category_mask(pd.Categorical(df["Segment Arrived to Airport vs Requested"]), "02. A tiempo (0-20 min antes)"),
         1, 0
-    )
-    return df.groupby("fecha", as_index=False).agg({"OFF_TIME": "sum"})
+    ).astype(np.uint8)
+    return df
 
+@daily_agg({"Duracion_90": "sum"})
 def process_duracion(df: pd.DataFrame) -> pd.DataFrame:
     df = clean_cols(df)
-    df["fecha"] = pd.to_datetime(df["Start At Local Dt"], errors="coerce").dt.normalize()
-    df["Duracion_90"] = np.where(pd.to_numeric(df["Duration (Minutes)"], errors="coerce") > 90, 1, 0)
-    return df.groupby("fecha", as_index=False).agg({"Duracion_90": "sum"})
+    df["fecha"] = to_fecha(df["Start At Local Dt"])
+    df["Duracion_90"] = np.where(pd.to_numeric(df["Duration (Minutes)"], errors="coerce") > 90, 1, 0).astype(np.uint8)
+    return df
 
+@daily_agg({"Duracion_30": "sum"})
 def process_duracion30(df: pd.DataFrame) -> pd.DataFrame:
     df = clean_cols(df)
     col_name = "Day of tm_start_local_at"
     
     if col_name not in df.columns:
-        return pd.DataFrame(columns=["fecha", "Duracion_30"])
-
-    def parse_english_date(val):
-        s = str(val).strip()
-        meses = {
-            "January": "01", "February": "02", "March": "03", "April": "04", "May": "05", "June": "06",
-            "July": "07", "August": "08", "September": "09", "October": "10", "November": "11", "December": "12"
-        }
-        for m_eng, m_num in meses.items():
-            if m_eng in s:
-                s = s.replace(m_eng, m_num)
-                break
-        try: return datetime.strptime(s, "%m %d, %Y")
-        except: return pd.NaT
+        return None
+
+    meses = {
+        "January": "01", "February": "02", "March": "03", "April": "04", "May": "05", "June": "06",
+        "July": "07", "August": "08", "September": "09", "October": "10", "November": "11", "December": "12"
+    }
+    pattern = re.compile(r"\b(" + "|".join(meses) + r")\b")
 
     df["fecha_temp"] = pd.to_datetime(df[col_name], errors="coerce")
     mask_nat = df["fecha_temp"].isna()
     if mask_nat.any():
-        df.loc[mask_nat, "fecha_temp"] = df.loc[mask_nat, col_name].apply(parse_english_date)
+        s = df.loc[mask_nat, col_name].astype(str).str.strip()
+        s = s.str.replace(pattern, lambda m: meses[m.group(1)], regex=True)
+        df.loc[mask_nat, "fecha_temp"] = pd.to_datetime(s, format="%m %d, %Y", errors="coerce")
 
-    df["fecha"] = pd.to_datetime(df["fecha_temp"]).dt.normalize()
+    df["fecha"] = to_fecha(df["fecha_temp"])
     df = df[df["fecha"].notna()]
     
-    df["Duracion_30"] = 1
-    return df.groupby("fecha", as_index=False).agg({"Duracion_30": "sum"})
+    df["Duracion_30"] = np.ones(len(df), dtype=np.uint8)
+    return df
 
+@daily_agg({
+    "Inspecciones_Q": "sum", "Cump_Exterior": "sum", "Incump_Exterior": "sum",
+    "Cump_Interior": "sum", "Incump_Interior": "sum", "Cump_Conductor": "sum", "Incump_Conductor": "sum",
+})
 def process_inspecciones(df: pd.DataFrame) -> pd.DataFrame:
     df = clean_cols(df)
-    df["fecha"] = pd.to_datetime(df["Fecha"], errors="coerce").dt.normalize()
+    df["fecha"] = to_fecha(df["Fecha"])
 
     for c in ["Cumplimiento Exterior", "Cumplimiento Interior", "Cumplimiento Conductor"]:
         if c in df.columns:
             df[c] = pd.to_numeric(df[c], errors="coerce")
 
-    df["Inspecciones_Q"] = 1
-    df["Cump_Exterior"] = (df["Cumplimiento Exterior"] == 100).astype(int)
-    df["Incump_Exterior"] = ((df["Cumplimiento Exterior"] < 100) & df["Cumplimiento Exterior"].notna()).astype(int)
-    df["Cump_Interior"] = (df["Cumplimiento Interior"] == 100).astype(int)
-    df["Incump_Interior"] = ((df["Cumplimiento Interior"] < 100) & df["Cumplimiento Interior"].notna()).astype(int)
-    df["Cump_Conductor"] = (df["Cumplimiento Conductor"] == 100).astype(int)
-    df["Incump_Conductor"] = ((df["Cumplimiento Conductor"] < 100) & df["Cumplimiento Conductor"].notna()).astype(int)
+    df["Inspecciones_Q"] = np.ones(len(df), dtype=np.uint8)
+    df["Cump_Exterior"] = (df["Cumplimiento Exterior"] == 100).astype(np.uint8)
+    df["Incump_Exterior"] = ((df["Cumplimiento Exterior"] < 100) & df["Cumplimiento Exterior"].notna()).astype(np.uint8)
+    df["Cump_Interior"] = (df["Cumplimiento Interior"] == 100).astype(np.uint8)
+    df["Incump_Interior"] = ((df["Cumplimiento Interior"] < 100) & df["Cumplimiento Interior"].notna()).astype(np.uint8)
+    df["Cump_Conductor"] = (df["Cumplimiento Conductor"] == 100).astype(np.uint8)
+    df["Incump_Conductor"] = ((df["Cumplimiento Conductor"] < 100) & df["Cumplimiento Conductor"].notna()).astype(np.uint8)
 
-    diario = df.groupby("fecha", as_index=False).agg({
-        "Inspecciones_Q": "sum", "Cump_Exterior": "sum", "Incump_Exterior": "sum",
-        "Cump_Interior": "sum", "Incump_Interior": "sum", "Cump_Conductor": "sum", "Incump_Conductor": "sum",
-    })
-    return diario
+    return df
 
+@daily_agg({"Abandonados": "sum"})
 def process_abandonados(df: pd.DataFrame) -> pd.DataFrame:
     df = clean_cols(df)
-    df["fecha"] = pd.to_datetime(df["Marca temporal"], errors="coerce").dt.normalize()
-    df["Abandonados"] = 1
-    return df.groupby("fecha", as_index=False).agg({"Abandonados": "sum"})
+    df["fecha"] = to_fecha(df["Marca temporal"])
+    df["Abandonados"] = np.ones(len(df), dtype=np.uint8)
+    return df
 
+@daily_agg({"Rescates": "sum"})
 def process_rescates(df: pd.DataFrame) -> pd.DataFrame:
     df = clean_cols(df)
     col_fecha = "Start At Local Dt"
     if col_fecha not in df.columns:
-        return pd.DataFrame(columns=["fecha", "Rescates"])
+        return None
 
-    df["fecha"] = pd.to_datetime(df[col_fecha], dayfirst=True, errors="coerce").dt.normalize()
+    df["fecha"] = to_fecha(df[col_fecha], dayfirst=True)
     df = df[df["fecha"].notna()]
-    df["Rescates"] = 1
-    return df.groupby("fecha", as_index=False).agg({"Rescates": "sum"})
+    df["Rescates"] = np.ones(len(df), dtype=np.uint8)
+    return df
 
+@daily_agg({"Q_Tickets_WA": "sum"})
 def process_whatsapp(df: pd.DataFrame) -> pd.DataFrame:
     df = clean_cols(df)
     if "Created At Local Dt" not in df.columns:
-        return pd.DataFrame(columns=["fecha", "Q_Tickets_WA"])
-    df["fecha"] = pd.to_datetime(df["Created At Local Dt"], errors="coerce").dt.normalize()
-    df["Q_Tickets_WA"] = 1
-    return df.groupby("fecha", as_index=False).agg({"Q_Tickets_WA": "sum"})
+        return None
+    df["fecha"] = to_fecha(df["Created At Local Dt"])
+    df["Q_Tickets_WA"] = np.ones(len(df), dtype=np.uint8)
+    return df
 
 # ============================================================
 # 📅 SEMANA HUMANA
 # ============================================================
 
-def semana_humana(fecha: pd.Timestamp) -> str:
-    lunes = fecha - pd.Timedelta(days=fecha.weekday())
+MESES = {
+    1: "Enero", 2: "Febrero", 3: "Marzo", 4: "Abril", 5: "Mayo", 6: "Junio",
+    7: "Julio", 8: "Agosto", 9: "Septiembre", 10: "Octubre", 11: "Noviembre", 12: "Diciembre"
+}
+MESES_SERIES = pd.Series(MESES)
+
+def semana_humana_vec(fecha: pd.Series) -> pd.Series:
+    lunes = fecha - pd.to_timedelta(fecha.dt.weekday, unit="D")
     domingo = lunes + pd.Timedelta(days=6)
-    meses = {
-        1: "Enero", 2: "Febrero", 3: "Marzo", 4: "Abril", 5: "Mayo", 6: "Junio",
-        7: "Julio", 8: "Agosto", 9: "Septiembre", 10: "Octubre", 11: "Noviembre", 12: "Diciembre"
-    }
-    return f"{lunes.day}-{domingo.day} {meses[domingo.month]}"
+    return lunes.dt.day.astype(str) + "-" + domingo.dt.day.astype(str) + " " + domingo.dt.month.map(MESES_SERIES)
 
 # ============================================================
 # 🔵 PROCESAR GLOBAL
 # ============================================================
 
 def procesar_global(df_ventas, df_perf, df_aud, df_off, df_dur, df_dur30, df_insp, df_aband, df_resc, df_whatsapp, date_from, date_to):
-    v = process_ventas(df_ventas)
-    p = process_performance(df_perf)
-    a = process_auditorias(df_aud)
-    o = process_offtime(df_off)
-    d = process_duracion(df_dur)
-    d30 = process_duracion30(df_dur30)
-    insp = process_inspecciones(df_insp)
-    ab = process_abandonados(df_aband)
-    resc = process_rescates(df_resc)
-    wa = process_whatsapp(df_whatsapp)
-
-    df = (v.merge(p, on="fecha", how="outer").merge(a, on="fecha", how="outer")
-           .merge(o, on="fecha", how="outer").merge(d, on="fecha", how="outer")
-           .merge(d30, on="fecha", how="outer").merge(insp, on="fecha", how="outer")
-           .merge(ab, on="fecha", how="outer").merge(resc, on="fecha", how="outer")
-           .merge(wa, on="fecha", how="outer"))
-
-    df = df[(df["fecha"] >= date_from) & (df["fecha"] <= date_to)].sort_values("fecha")
+    jobs = {
+        "v": (process_ventas, df_ventas), "p": (process_performance, df_perf), "a": (process_auditorias, df_aud),
+        "o": (process_offtime, df_off), "d": (process_duracion, df_dur), "d30": (process_duracion30, df_dur30),
+        "insp": (process_inspecciones, df_insp), "ab": (process_abandonados, df_aband),
+        "resc": (process_rescates, df_resc), "wa": (process_whatsapp, df_whatsapp),
+    }
+    # Los process_* son independientes y pasan la mayor parte del tiempo en código C de pandas.
+    with ThreadPoolExecutor(max_workers=min(len(jobs), os.cpu_count() or 1)) as ex:
+        futures = {name: ex.submit(fn, data) for name, (fn, data) in jobs.items()}
+        results = {name: f.result() for name, f in futures.items()}
+
+    idx = pd.date_range(date_from, date_to, freq="D", name="fecha")
+    frames = [f.set_index("fecha").reindex(idx) for f in results.values()]
+    df = pd.concat(frames, axis=1)
+    df = df.dropna(how="all").reset_index()
 
     sum_cols = ["Q_Encuestas", "Reopen", "Q_Ticket", "Q_Tickets_Resueltos", "Q_Tickets_WA", "Q_Auditorias",
                 "Ventas_Totales", "Ventas_Compartidas", "Ventas_Exclusivas", "Q_journeys", "Q_pasajeros", 
@@ -335,11 +381,16 @@ def procesar_global(df_ventas, df_perf, df_aud, df_off, df_dur, df_dur30, df_ins
                 "Abandonados", "Rescates", "Inspecciones_Q", "Cump_Exterior", "Incump_Exterior", "Cump_Interior", 
                 "Incump_Interior", "Cump_Conductor", "Incump_Conductor"]
 
+    # Contadores propios (flags 0/1 sumados): caben en int32. Montos y "Reopen" (columna de origen) quedan como vienen.
+    count_cols = [c for c in sum_cols if c not in ("Ventas_Totales", "Ventas_Compartidas", "Ventas_Exclusivas", "Reopen")]
+
     mean_cols = ["CSAT", "NPS Score", "Firt (h)", "Furt (h)", "firt_pct", "furt_pct", "Nota_Auditorias"]
 
     for c in sum_cols:
         if c in df.columns:
             df[c] = df[c].fillna(0)
+            if c in count_cols:
+                df[c] = df[c].astype("int32")
 
     for c in mean_cols:
         if c in df.columns and c != "Nota_Auditorias":
@@ -353,7 +404,7 @@ def procesar_global(df_ventas, df_perf, df_aud, df_off, df_dur, df_dur30, df_ins
         pct_cols.append(colp)
 
     df_sem = df.copy()
-    df_sem["Semana"] = df_sem["fecha"].apply(semana_humana)
+    df_sem["Semana"] = semana_humana_vec(df_sem["fecha"])
     agg = {c: "sum" for c in sum_cols}
     agg.update({c: "mean" for c in mean_cols})
     df_sem = df_sem.groupby("Semana", as_index=False).agg(agg)
@@ -366,58 +417,90 @@ def procesar_global(df_ventas, df_perf, df_aud, df_off, df_dur, df_dur30, df_ins
     for op in operativos:
         df_per[f"{op}_pct_pasajeros"] = safe_pct(df_per[op], df_per["Q_pasajeros"]).round(4)
 
-    df_transp = build_transposed_view(df, sum_cols=sum_cols, mean_cols=mean_cols, pct_cols=pct_cols)
+    df_transp, week_col_positions = build_transposed_view(df, sum_cols=sum_cols, mean_cols=mean_cols, pct_cols=pct_cols)
 
-    return df, df_sem, df_per, df_transp
+    return df, df_sem, df_per, df_transp, week_col_positions
+
+def agg_segments(arr, starts, ends, sum_mask, mean_mask, pct_pairs):
+    out = np.full((len(starts), arr.shape[1]), np.nan)
+    if len(starts) == 0:
+        return out
+
+    valid = ~np.isnan(arr)
+    # Fila extra en cero: permite usar end == len(arr) como índice de reduceat.
+    filled = np.vstack([np.where(valid, arr, 0.0), np.zeros((1, arr.shape[1]))])
+    counts = np.vstack([valid.astype(np.int64), np.zeros((1, arr.shape[1]), dtype=np.int64)])
+    idx = np.column_stack([starts, ends]).ravel()
+    sums = np.add.reduceat(filled, idx, axis=0)[::2]
+    counts = np.add.reduceat(counts, idx, axis=0)[::2]
+
+    out[:, sum_mask] = sums[:, sum_mask]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        out[:, mean_mask] = sums[:, mean_mask] / counts[:, mean_mask]
+        for k, op, den in pct_pairs:
+            if op >= 0 and den >= 0:
+                out[:, k] = np.where(sums[:, den] != 0, sums[:, op] / sums[:, den] * 100.0, np.nan)
+    return out
 
 def build_transposed_view(df_diario, sum_cols, mean_cols, pct_cols=None):
-    if df_diario is None or df_diario.empty: return pd.DataFrame()
+    if df_diario is None or df_diario.empty: return pd.DataFrame(), []
     df = df_diario.copy()
-    df["fecha"] = pd.to_datetime(df["fecha"]).dt.normalize()
+    df["fecha"] = to_fecha(df["fecha"])
     df = df.sort_values("fecha")
     kpis = [c for c in df.columns if c != "fecha"]
     
     operativos = ["OFF_TIME", "Duracion_90", "Duracion_30", "Abandonados", "Rescates"]
     if pct_cols is None: pct_cols = [f"{op}_pct_pasajeros" for op in operativos if f"{op}_pct_pasajeros" in df.columns]
     
-    meses = {1: "Enero", 2: "Febrero", 3: "Marzo", 4: "Abril", 5: "Mayo", 6: "Junio", 7: "Julio", 8: "Agosto", 9: "Septiembre", 10: "Octubre", 11: "Noviembre", 12: "Diciembre"}
+    meses = MESES
     def week_label(s_date, e_date): return f"Semana {s_date.day:02d} al {e_date.day:02d} {meses[e_date.month]} {e_date.year}"
     def month_label(a_date): return f"Mes {meses[a_date.month]} {a_date.year}"
-    def recompute_pct(subdf, op_name):
-        denom = subdf.get("Q_pasajeros", pd.Series([0]*len(subdf), index=subdf.index)).sum()
-        if denom == 0: return np.nan
-        return (subdf[op_name].sum() / denom) * 100.0
 
-    all_dates = [pd.to_datetime(d).normalize() for d in sorted(df["fecha"].unique())]
-    result = pd.DataFrame(index=kpis)
+    fechas = df["fecha"].to_numpy()
+    unique_dates = np.unique(fechas)
+    all_dates = [pd.Timestamp(d) for d in unique_dates]
+    starts = np.searchsorted(fechas, unique_dates, side="left")
+    ends = np.searchsorted(fechas, unique_dates, side="right")
+    arr = np.ascontiguousarray(
+        df[kpis].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+    )
 
+    es_pct = np.array([k in pct_cols for k in kpis], dtype=bool)
+    sum_mask = ~es_pct & np.array([k in sum_cols for k in kpis], dtype=bool)
+    mean_mask = ~es_pct & ~sum_mask & np.array([k in mean_cols for k in kpis], dtype=bool)
+    pos = {k: j for j, k in enumerate(kpis)}
+    den = pos.get("Q_pasajeros", -1)
+    pct_pairs = [(pos[k], pos.get(k.replace("_pct_pasajeros", ""), -1), den) for k in kpis if k in pct_cols]
+
+    valores = df[kpis]
+    columnas = {}
+    seg_labels, seg_starts, seg_ends = [], [], []
+    week_col_positions = []
     for i, d in enumerate(all_dates):
-        day_df = df[df["fecha"] == d]
-        col_day = d.strftime("%d/%m/%Y")
-        result[col_day] = day_df[kpis].iloc[0] if len(day_df) > 0 else np.nan
+        columnas[d.strftime("%d/%m/%Y")] = valores.iloc[starts[i]]
 
         if d.weekday() == 6:
             ws = d - pd.Timedelta(days=6)
-            week_df = df[(df["fecha"] >= ws) & (df["fecha"] <= d)]
-            vals = []
-            for k in kpis:
-                if k in pct_cols: vals.append(recompute_pct(week_df, k.replace("_pct_pasajeros", "")))
-                elif k in sum_cols: vals.append(week_df[k].sum())
-                elif k in mean_cols: vals.append(week_df[k].mean())
-                else: vals.append(np.nan)
-            result[week_label(ws, d)] = vals
+            seg_labels.append(week_label(ws, d))
+            week_col_positions.append(len(columnas) + 1)  # +1: la columna "KPI" se inserta al inicio
+            seg_starts.append(np.searchsorted(fechas, ws.to_datetime64(), side="left"))
+            seg_ends.append(ends[i])
+            columnas[seg_labels[-1]] = None
 
         next_d = all_dates[i + 1] if i + 1 < len(all_dates) else None
         if (next_d is None) or (next_d.month != d.month) or (next_d.year != d.year):
             ms = d.replace(day=1)
-            month_df = df[(df["fecha"] >= ms) & (df["fecha"] <= d)]
-            vals = []
-            for k in kpis:
-                if k in pct_cols: vals.append(recompute_pct(month_df, k.replace("_pct_pasajeros", "")))
-                elif k in sum_cols: vals.append(month_df[k].sum())
-                elif k in mean_cols: vals.append(month_df[k].mean())
-                else: vals.append(np.nan)
-            result[month_label(d)] = vals
+            seg_labels.append(month_label(d))
+            seg_starts.append(np.searchsorted(fechas, ms.to_datetime64(), side="left"))
+            seg_ends.append(ends[i])
+            columnas[seg_labels[-1]] = None
+
+    agregados = agg_segments(arr, np.array(seg_starts, dtype=np.intp), np.array(seg_ends, dtype=np.intp),
+                             sum_mask, mean_mask, pct_pairs)
+    for label, vals in zip(seg_labels, agregados):
+        columnas[label] = vals
+
+    result = pd.DataFrame(columnas, index=kpis)
 
     grupos = {
         "VENTAS (MONTO)": ["Ventas_Totales", "Ventas_Compartidas", "Ventas_Exclusivas"],
@@ -446,4 +529,4 @@ def build_transposed_view(df_diario, sum_cols, mean_cols, pct_cols=None):
 
     result = result.reindex(new_index)
     result.insert(0, "KPI", result.index)
-    return result.reset_index(drop=True)
+    return result.reset_index(drop=True), week_col_positions